@@ -4,29 +4,109 @@ FastAPI server for Miras Backend - serves the chat frontend.
 """
 
 import asyncio
+import concurrent.futures
+import functools
+import heapq
 import json
+import re
 import uuid
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 import logging
+import logging.handlers
+import os
+import queue
+import tempfile
 
 from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import aiofiles
 import httpx
+import ijson
+import orjson
+from cachetools import LRUCache, TTLCache
 from contextlib import asynccontextmanager
+from httpx_sse import aconnect_sse
 
 from config import settings
 from validation import GeminiValidator
 from ingestion.processor import PDFProcessor
 from ingestion.uploader import ContextualUploader
 
-# Configure logging
+# Configure logging - handlers run on a QueueListener thread so log I/O
+# never blocks the asyncio event loop
 logging.basicConfig(level=logging.INFO)
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_root_logger = logging.getLogger()
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, *_root_logger.handlers, respect_handler_level=True
+)
+_root_logger.handlers = [logging.handlers.QueueHandler(_log_queue)]
+_log_listener.start()
 logger = logging.getLogger(__name__)
 
+# Matches citations like .[1]() or .[1]()()
+_CITATION_RE = re.compile(r'\.\[(\d+)\]\(\)')
+
+# Coalescing window for answer deltas: flush once this many chars are pending
+# or this much time has passed, whichever comes first
+SSE_FLUSH_CHARS = 256
+SSE_FLUSH_SECONDS = 0.05
+
+# Isolated scratch dir for uploads in flight
+_INGEST_TMP_DIR = Path(tempfile.gettempdir()) / "miras-ingest"
+
+async def _aiter_blocking(gen):
+    """Consume a blocking generator on a worker thread, yielding items as they
+    arrive so the event loop stays free between them."""
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def pump():
+        try:
+            for item in gen:
+                loop.call_soon_threadsafe(items.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(items.put_nowait, done)
+
+    pump_future = loop.run_in_executor(None, pump)
+    while True:
+        item = await items.get()
+        if item is done:
+            break
+        yield item
+    await pump_future  # surfaces any exception from the generator
+
+def _sse(obj) -> bytes:
+    """Serialize a payload as an SSE data event. orjson emits bytes directly,
+    skipping both stdlib json overhead and Starlette's str->bytes encode."""
+    return b"data: " + orjson.dumps(obj) + b"\n\n"
+
+# Fixed phase events, serialized once at import instead of per request
+_SEARCH_EVENT = _sse({'phase': 'search', 'content': 'Searching documents...'})
+_SYNTHESIS_EVENT = _sse({'phase': 'synthesis', 'content': 'Analyzing results...'})
+_VALIDATION_START_EVENT = _sse({'phase': 'validation_start', 'content': 'Starting validation...'})
+_COMPLETE_EVENT = _sse({'phase': 'complete'})
+
+class _AiterReader:
+    """Adapts an async byte iterator to the async file-like object ijson expects."""
+
+    def __init__(self, aiter_bytes):
+        self._aiter = aiter_bytes
+
+    async def read(self, size=-1):
+        if size == 0:
+            # ijson probes with read(0) to detect bytes vs str sources
+            return b""
+        try:
+            return await self._aiter.__anext__()
+        except StopAsyncIteration:
+            return b""
+
 # ==================== MODELS ====================
 class SearchRequest(BaseModel):
     query: str
@@ -59,19 +139,220 @@ class DocumentInfo(BaseModel):
     created_at: str
     updated_at: str
 
-# ==================== IN-MEMORY STORAGE ====================
-# In production, use a database
-sessions_store: Dict[str, Session] = {}
-messages_store: Dict[str, List[SessionMessage]] = {}
-documents_store: Dict[str, DocumentInfo] = {}
+# ==================== STORAGE ====================
+SESSION_TTL = 86400  # seconds - Redis keys expire after a day of inactivity
+DOCUMENTS_CACHE_TTL = 60  # seconds - document listings change only via ingest
+
+class MemoryStorage:
+    """In-memory storage for single-worker runs without Redis.
+
+    Stores are bounded TTL/LRU caches rather than plain dicts so a
+    long-running process can't grow them without limit."""
+
+    def __init__(self):
+        self.sessions = TTLCache(maxsize=10_000, ttl=SESSION_TTL)
+        self.messages = TTLCache(maxsize=10_000, ttl=SESSION_TTL)
+        self.documents = LRUCache(maxsize=10_000)
+        self._cache = TTLCache(maxsize=1024, ttl=DOCUMENTS_CACHE_TTL)
+        self._docs_version = 0
+
+    async def get_session(self, session_id: str) -> Optional[Session]:
+        return self.sessions.get(session_id)
+
+    async def put_session(self, session: Session):
+        self.sessions[session.id] = session
+        self.messages.setdefault(session.id, [])
+
+    async def delete_session(self, session_id: str) -> bool:
+        if session_id not in self.sessions:
+            return False
+        del self.sessions[session_id]
+        self.messages.pop(session_id, None)
+        return True
+
+    async def list_sessions(self, limit: int, active_only: bool = False) -> List[Session]:
+        sessions = self.sessions.values()
+        if active_only:
+            sessions = [s for s in sessions if s.is_active]
+        # O(N log limit) instead of sorting the whole store for a page of results
+        return heapq.nlargest(limit, sessions, key=lambda x: x.last_message_at)
+
+    async def append_message(self, session_id: str, message: SessionMessage):
+        self.messages.setdefault(session_id, []).append(message)
+
+    async def get_messages(self, session_id: str) -> Optional[List[SessionMessage]]:
+        return self.messages.get(session_id)
+
+    async def put_document(self, document: DocumentInfo):
+        self.documents[document.id] = document
+
+    async def delete_document(self, doc_id: str) -> bool:
+        return self.documents.pop(doc_id, None) is not None
+
+    async def list_documents(self) -> List[DocumentInfo]:
+        return list(self.documents.values())
+
+    async def cache_get(self, key: str):
+        return self._cache.get(key)
+
+    async def cache_set(self, key: str, value, ttl: int):
+        # ttl is fixed by the TTLCache; the parameter matters for Redis
+        self._cache[key] = value
+
+    async def docs_version(self) -> int:
+        return self._docs_version
+
+    async def bump_docs_version(self):
+        self._docs_version += 1
+
+    async def aclose(self):
+        pass
+
+class RedisStorage:
+    """Redis-backed storage - shared across uvicorn workers, TTL-based eviction."""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def get_session(self, session_id: str) -> Optional[Session]:
+        raw = await self.redis.get(f"session:{session_id}")
+        return Session.model_validate_json(raw) if raw else None
+
+    async def put_session(self, session: Session):
+        score = datetime.fromisoformat(session.last_message_at).timestamp()
+        pipe = self.redis.pipeline()
+        pipe.setex(f"session:{session.id}", SESSION_TTL, session.model_dump_json())
+        pipe.zadd("sessions:by_time", {session.id: score})
+        await pipe.execute()
+
+    async def delete_session(self, session_id: str) -> bool:
+        pipe = self.redis.pipeline()
+        pipe.delete(f"session:{session_id}", f"messages:{session_id}")
+        pipe.zrem("sessions:by_time", session_id)
+        deleted, _ = await pipe.execute()
+        return deleted > 0
+
+    async def list_sessions(self, limit: int, active_only: bool = False) -> List[Session]:
+        # The ZSET keeps sessions ordered by last_message_at, newest first
+        session_ids = await self.redis.zrevrange("sessions:by_time", 0, -1)
+        sessions = []
+        for session_id in session_ids:
+            session = await self.get_session(session_id)
+            if session is None:
+                # Key expired - drop it from the index
+                await self.redis.zrem("sessions:by_time", session_id)
+                continue
+            if active_only and not session.is_active:
+                continue
+            sessions.append(session)
+            if len(sessions) >= limit:
+                break
+        return sessions
+
+    async def append_message(self, session_id: str, message: SessionMessage):
+        pipe = self.redis.pipeline()
+        pipe.rpush(f"messages:{session_id}", message.model_dump_json())
+        pipe.expire(f"messages:{session_id}", SESSION_TTL)
+        await pipe.execute()
+
+    async def get_messages(self, session_id: str) -> Optional[List[SessionMessage]]:
+        if not await self.redis.exists(f"session:{session_id}"):
+            return None
+        raw_messages = await self.redis.lrange(f"messages:{session_id}", 0, -1)
+        return [SessionMessage.model_validate_json(raw) for raw in raw_messages]
+
+    async def put_document(self, document: DocumentInfo):
+        pipe = self.redis.pipeline()
+        pipe.set(f"document:{document.id}", document.model_dump_json())
+        pipe.sadd("documents:ids", document.id)
+        await pipe.execute()
+
+    async def delete_document(self, doc_id: str) -> bool:
+        pipe = self.redis.pipeline()
+        pipe.delete(f"document:{doc_id}")
+        pipe.srem("documents:ids", doc_id)
+        deleted, _ = await pipe.execute()
+        return deleted > 0
+
+    async def list_documents(self) -> List[DocumentInfo]:
+        doc_ids = await self.redis.smembers("documents:ids")
+        if not doc_ids:
+            return []
+        raw_docs = await self.redis.mget([f"document:{doc_id}" for doc_id in doc_ids])
+        return [DocumentInfo.model_validate_json(raw) for raw in raw_docs if raw]
+
+    async def cache_get(self, key: str):
+        return await self.redis.get(f"cache:{key}")
+
+    async def cache_set(self, key: str, value, ttl: int):
+        await self.redis.setex(f"cache:{key}", ttl, value)
+
+    async def docs_version(self) -> int:
+        return int(await self.redis.get("documents:version") or 0)
+
+    async def bump_docs_version(self):
+        # Version-keyed caching sidesteps a KEYS scan on invalidation - stale
+        # entries just age out via their TTL
+        await self.redis.incr("documents:version")
+
+    async def aclose(self):
+        await self.redis.aclose()
+
+# Per-session locks: the session read-modify-write in /api/search spans awaits,
+# so concurrent requests for the same session could otherwise lose updates.
+# Bounded like the session stores themselves — entries age out after
+# SESSION_TTL instead of leaking one Lock per session for the process lifetime
+_session_locks: TTLCache = TTLCache(maxsize=10_000, ttl=SESSION_TTL)
+
+def _session_lock(session_id: str) -> asyncio.Lock:
+    """Return the lock for a session, creating it on first use."""
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+async def create_storage():
+    """Use Redis when configured so state survives restarts and is shared across workers."""
+    if settings.REDIS_URL:
+        import redis.asyncio as aioredis
+        redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        try:
+            await redis_client.ping()
+            logger.info("Using Redis storage")
+            return RedisStorage(redis_client)
+        except Exception as e:
+            logger.warning(f"Redis unavailable ({e}), falling back to in-memory storage")
+    return MemoryStorage()
 
 # ==================== LIFESPAN ====================
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Miras API Server")
+    # Shared HTTP client - reuses connections/TLS sessions across requests,
+    # and HTTP/2 lets concurrent streams multiplex over one connection
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        timeout=60.0,
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+    )
+    app.state.storage = await create_storage()
+    # Executor for blocking ingestion work (Gemini extraction, Contextual
+    # upload) so it never stalls the event loop. The work is network-bound,
+    # so threads suffice - no need for process isolation
+    app.state.executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=4, thread_name_prefix="ingest"
+    )
+    # Shared service clients - Gemini/Contextual SDK setup happens once at
+    # startup instead of per request
+    app.state.contextual = ContextualClient(app.state.http)
+    app.state.pdf_processor = PDFProcessor()
+    app.state.uploader = ContextualUploader()
     yield
     # Shutdown
+    app.state.executor.shutdown(wait=False, cancel_futures=True)
+    await app.state.storage.aclose()
+    await app.state.http.aclose()
     logger.info("Shutting down Miras API Server")
 
 # ==================== APP ====================
@@ -95,7 +376,7 @@ app.add_middleware(
 class ContextualClient:
     """Client for Contextual AI streaming."""
     
-    def __init__(self):
+    def __init__(self, http_client: httpx.AsyncClient):
         self.api_key = settings.CONTEXTUAL_API_KEY
         self.agent_id = settings.CONTEXTUAL_AGENT_ID
         self.base_url = settings.CONTEXTUAL_BASE_URL
@@ -103,12 +384,15 @@ class ContextualClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.http = http_client
         self.validator = GeminiValidator()
-    
+        # Request-invariant values, computed once instead of per query
+        self.query_url = f"{self.base_url}/agents/{self.agent_id}/query"
+        self.enable_validation = settings.ENABLE_VALIDATION
+
     async def stream_query(self, query: str, conversation_id: Optional[str] = None):
         """Stream query to Contextual and yield SSE events."""
-        url = f"{self.base_url}/agents/{self.agent_id}/query"
-        
+
         payload = {
             "messages": [{"role": "user", "content": query}],
             "stream": True
@@ -119,107 +403,129 @@ class ContextualClient:
         if conversation_id and conversation_id != "null" and len(conversation_id) > 10:
             payload["conversation_id"] = conversation_id
         
-        full_response = ""
+        # Collect chunks in a list and join once - avoids quadratic str += in long streams
+        response_parts = []
         retrievals = []
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                # Yield search phase
-                yield f"data: {json.dumps({'phase': 'search', 'content': 'Searching documents...'})}\n\n"
-                
-                async with client.stream("POST", url, headers=self.headers, json=payload) as response:
-                    response.raise_for_status()
-                    
-                    # Yield synthesis phase
-                    yield f"data: {json.dumps({'phase': 'synthesis', 'content': 'Analyzing results...'})}\n\n"
-                    
-                    line_count = 0
-                    async for line in response.aiter_lines():
-                        line_count += 1
-                        logger.info(f"Line {line_count}: {line[:100] if line else 'empty'}")
-                        if line.startswith("data: "):
-                            data_str = line[6:]
-                            
-                            if data_str == "[DONE]":
-                                break
+
+        # Pending coalesced deltas - Contextual can emit single-token events,
+        # and one SSE send per token costs an ASGI message + socket write each
+        loop = asyncio.get_running_loop()
+        pending = []
+        pending_len = 0
+        last_flush = loop.time()
+
+        try:
+            # Yield search phase
+            yield _SEARCH_EVENT
+
+            # httpx-sse handles the SSE framing (multi-line data, comments,
+            # ids) in one place instead of per-line prefix scans here
+            async with aconnect_sse(self.http, "POST", self.query_url, headers=self.headers, json=payload) as event_source:
+                event_source.response.raise_for_status()
+
+                # Yield synthesis phase
+                yield _SYNTHESIS_EVENT
+
+                async for sse in event_source.aiter_sse():
+                    if sse.data == "[DONE]":
+                        break
+
+                    try:
+                        data = json.loads(sse.data)
+                        event_type = data.get("event", "")
+                        event_data = data.get("data", {})
+                        
+                        # Debug logging - guard so the f-string isn't even built when DEBUG is off
+                        if event_type == "message_delta" and logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(f"Message delta: {event_data.get('delta', '')[:50]}")
+                        
+                        # Handle conversation ID
+                        if event_type == "metadata" and "conversation_id" in event_data:
+                            # Flush buffered answer text before a phase change
+                            if pending:
+                                yield _sse({'phase': 'answer', 'content': ''.join(pending)})
+                                pending.clear()
+                                pending_len = 0
+                                last_flush = loop.time()
+                            conv_id = event_data["conversation_id"]
+                            if not conversation_id:
+                                yield _sse({'phase': 'session_created', 'session_id': conv_id})
+                            else:
+                                yield _sse({'phase': 'session_continued', 'session_id': conv_id})
+                        
+                        # Stream answer chunks, coalesced into short windows
+                        if event_type == "message_delta" and "delta" in event_data:
+                            chunk = event_data["delta"]
+                            response_parts.append(chunk)
+                            pending.append(chunk)
+                            pending_len += len(chunk)
+                            now = loop.time()
+                            if pending_len >= SSE_FLUSH_CHARS or now - last_flush >= SSE_FLUSH_SECONDS:
+                                yield _sse({'phase': 'answer', 'content': ''.join(pending)})
+                                pending.clear()
+                                pending_len = 0
+                                last_flush = now
+                        
+                        # Capture retrievals for validation
+                        if event_type == "retrievals" and "contents" in event_data:
+                            retrievals = event_data["contents"]
                             
-                            try:
-                                data = json.loads(data_str)
-                                event_type = data.get("event", "")
-                                event_data = data.get("data", {})
-                                
-                                # Debug logging
-                                if event_type == "message_delta":
-                                    logger.debug(f"Message delta: {event_data.get('delta', '')[:50]}")
-                                
-                                # Handle conversation ID
-                                if event_type == "metadata" and "conversation_id" in event_data:
-                                    conv_id = event_data["conversation_id"]
-                                    if not conversation_id:
-                                        yield f"data: {json.dumps({'phase': 'session_created', 'session_id': conv_id})}\n\n"
-                                    else:
-                                        yield f"data: {json.dumps({'phase': 'session_continued', 'session_id': conv_id})}\n\n"
-                                
-                                # Stream answer chunks
-                                if event_type == "message_delta" and "delta" in event_data:
-                                    chunk = event_data["delta"]
-                                    full_response += chunk
-                                    # Stream the chunk as-is without cleaning
-                                    yield f"data: {json.dumps({'phase': 'answer', 'content': chunk})}\n\n"
-                                
-                                # Capture retrievals for validation
-                                if event_type == "retrievals" and "contents" in event_data:
-                                    retrievals = event_data["contents"]
-                                    
-                            except json.JSONDecodeError:
-                                continue
-                
-                # Extract citations from the response
-                import re
-                # Match citations like .[1]() or .[1]()()
-                citation_pattern = r'\.\[(\d+)\]\(\)'
-                citations_found = re.findall(citation_pattern, full_response)
+                    except json.JSONDecodeError:
+                        continue
+            
+            # Flush whatever is left from the final window
+            if pending:
+                yield _sse({'phase': 'answer', 'content': ''.join(pending)})
+                pending.clear()
+                pending_len = 0
+
+            # Extract citations from the response
+            full_response = "".join(response_parts)
+            citations_found = _CITATION_RE.findall(full_response)
+            
+            # Send citations if found
+            if citations_found and retrievals:
+                citation_list = []
+                for cite_num in set(citations_found):
+                    try:
+                        idx = int(cite_num) - 1
+                        if 0 <= idx < len(retrievals):
+                            ret = retrievals[idx]
+                            citation_list.append({
+                                "number": cite_num,
+                                "doc_name": ret.get("doc_name", "Unknown"),
+                                "page": ret.get("page", "N/A")
+                            })
+                    except (ValueError, IndexError):
+                        continue
                 
-                # Send citations if found
-                if citations_found and retrievals:
-                    citation_list = []
-                    for cite_num in set(citations_found):
-                        try:
-                            idx = int(cite_num) - 1
-                            if 0 <= idx < len(retrievals):
-                                ret = retrievals[idx]
-                                citation_list.append({
-                                    "number": cite_num,
-                                    "doc_name": ret.get("doc_name", "Unknown"),
-                                    "page": ret.get("page", "N/A")
-                                })
-                        except (ValueError, IndexError):
-                            continue
-                    
-                    if citation_list:
-                        yield f"data: {json.dumps({'phase': 'citations', 'citations': citation_list})}\n\n"
+                if citation_list:
+                    yield _sse({'phase': 'citations', 'citations': citation_list})
+            
+            # Run validation if we have a response
+            if full_response and self.enable_validation:
+                yield _VALIDATION_START_EVENT
                 
-                # Run validation if we have a response
-                if full_response and settings.ENABLE_VALIDATION:
-                    yield f"data: {json.dumps({'phase': 'validation_start', 'content': 'Starting validation...'})}\n\n"
-                    
-                    # Stream validation thinking and results
-                    for event_type, content in self.validator.validate_response_stream(query, full_response, retrievals):
-                        if event_type == "thought":
-                            # Stream thinking process, remove asterisks
-                            clean_content = content.replace('**', '')
-                            yield f"data: {json.dumps({'phase': 'validation_thinking', 'content': clean_content})}\n\n"
-                        elif event_type == "result":
-                            # Send validation results
-                            yield f"data: {json.dumps({'phase': 'validation_complete', 'validation': content})}\n\n"
+                # Stream validation thinking and results - the validator is a
+                # blocking generator, so iterate it off the event loop
+                async for event_type, content in _aiter_blocking(
+                    self.validator.validate_response_stream(query, full_response, retrievals)
+                ):
+                    if event_type == "thought":
+                        # Stream thinking process, remove asterisks
+                        clean_content = content.replace('**', '')
+                        yield _sse({'phase': 'validation_thinking', 'content': clean_content})
+                    elif event_type == "result":
+                        # Send validation results
+                        yield _sse({'phase': 'validation_complete', 'validation': content})
+            
+            # Mark as complete
+            yield _COMPLETE_EVENT
                 
-                # Mark as complete
-                yield f"data: {json.dumps({'phase': 'complete'})}\n\n"
-                    
-            except httpx.HTTPStatusError as e:
-                yield f"data: {json.dumps({'phase': 'error', 'error': f'API Error: {e.response.status_code}'})}\n\n"
-            except Exception as e:
-                yield f"data: {json.dumps({'phase': 'error', 'error': str(e)})}\n\n"
+        except httpx.HTTPStatusError as e:
+            yield _sse({'phase': 'error', 'error': f'API Error: {e.response.status_code}'})
+        except Exception as e:
+            yield _sse({'phase': 'error', 'error': str(e)})
 
 # ==================== ENDPOINTS ====================
 
@@ -234,41 +540,69 @@ async def search(request: SearchRequest):
     Stream search results from Contextual AI.
     Returns Server-Sent Events stream.
     """
-    client = ContextualClient()
-    
+    client = app.state.contextual
+    storage = app.state.storage
+
     # Create or get session
     session_id = request.session_id or str(uuid.uuid4())
-    
-    if session_id not in sessions_store:
-        sessions_store[session_id] = Session(
-            id=session_id,
-            title=request.query[:50],  # First 50 chars as title
-            started_at=datetime.now().isoformat(),
-            last_message_at=datetime.now().isoformat(),
-            message_count=1,
-            is_active=True
+
+    now = datetime.now().isoformat()
+
+    async with _session_lock(session_id):
+        session = await storage.get_session(session_id)
+        if session is None:
+            session = Session(
+                id=session_id,
+                title=request.query[:50],  # First 50 chars as title
+                started_at=now,
+                last_message_at=now,
+                message_count=1,
+                is_active=True
+            )
+        else:
+            # Update existing session
+            session.last_message_at = now
+            session.message_count += 1
+        await storage.put_session(session)
+
+        # Store message
+        message = SessionMessage(
+            id=str(uuid.uuid4()),
+            query=request.query,
+            enhanced_query=None,
+            response="",  # Will be filled as streaming completes
+            created_at=now
         )
-        messages_store[session_id] = []
-    else:
-        # Update existing session
-        sessions_store[session_id].last_message_at = datetime.now().isoformat()
-        sessions_store[session_id].message_count += 1
-    
-    # Store message
-    message = SessionMessage(
-        id=str(uuid.uuid4()),
-        query=request.query,
-        enhanced_query=None,
-        response="",  # Will be filled as streaming completes
-        created_at=datetime.now().isoformat()
-    )
-    messages_store[session_id].append(message)
-    
+        await storage.append_message(session_id, message)
+
+    # Don't pass session_id on first query - let Contextual create its conversation_id
+    contextual_conv_id = None if session.message_count <= 1 else session_id
+
+    # Producer/consumer split: a background task drains Contextual at full
+    # speed into a bounded queue, so a slow client reading the SSE response
+    # doesn't backpressure the upstream stream (or validation) directly
+    events: asyncio.Queue = asyncio.Queue(maxsize=256)
+    stream_done = object()
+
+    async def produce():
+        try:
+            async for event in client.stream_query(request.query, contextual_conv_id):
+                await events.put(event)
+        finally:
+            await events.put(stream_done)
+
     async def generate():
-        # Don't pass session_id on first query - let Contextual create its conversation_id
-        contextual_conv_id = None if session_id not in sessions_store or sessions_store[session_id].message_count <= 1 else session_id
-        async for event in client.stream_query(request.query, contextual_conv_id):
-            yield event
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                event = await events.get()
+                if event is stream_done:
+                    break
+                yield event
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
     
     return StreamingResponse(
         generate(),
@@ -286,49 +620,40 @@ async def get_sessions(
     active_only: bool = Query(False, description="Return only active sessions")
 ):
     """Get conversation sessions."""
-    sessions = list(sessions_store.values())
-    
-    if active_only:
-        sessions = [s for s in sessions if s.is_active]
-    
-    # Sort by last message time
-    sessions.sort(key=lambda x: x.last_message_at, reverse=True)
-    
+    sessions = await app.state.storage.list_sessions(limit, active_only)
+
     return {
-        "sessions": sessions[:limit]
+        "sessions": sessions
     }
 
 @app.get("/api/conversation/sessions/{session_id}/messages")
 async def get_session_messages(session_id: str):
     """Get messages for a specific session."""
-    if session_id not in messages_store:
+    messages = await app.state.storage.get_messages(session_id)
+    if messages is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    return messages_store[session_id]
+
+    return messages
 
 @app.delete("/api/conversation/sessions/{session_id}")
 async def delete_session(session_id: str):
     """Delete a conversation session."""
-    if session_id not in sessions_store:
+    if not await app.state.storage.delete_session(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    del sessions_store[session_id]
-    if session_id in messages_store:
-        del messages_store[session_id]
-    
+
     return {"success": True, "message": "Session deleted"}
 
 @app.get("/api/documents")
 async def get_documents(
-    limit: int = Query(1000, description="Maximum number of documents to return"),
+    limit: int = Query(50, le=500, description="Page size; follow next_cursor for more"),
     cursor: Optional[str] = Query(None, description="Pagination cursor")
 ):
     """Get list of documents from Contextual datastore."""
     datastore_id = settings.CONTEXTUAL_DATASTORE_ID
     
     if not datastore_id:
-        # Fallback to in-memory store if no datastore ID
-        documents = list(documents_store.values())
+        # Fallback to local store if no datastore ID
+        documents = await app.state.storage.list_documents()
         return {
             "success": True,
             "documents": documents,
@@ -336,71 +661,93 @@ async def get_documents(
             "error": None
         }
     
+    # Serve from cache when the listing was fetched recently - the datastore
+    # only changes through the ingest endpoint, which bumps the version key
+    storage = app.state.storage
+    cache_key = f"docs:{await storage.docs_version()}:{limit}:{cursor}"
+    cached = await storage.cache_get(cache_key)
+    if cached is not None:
+        return orjson.loads(cached)
+
     # Fetch from Contextual API
     url = f"{settings.CONTEXTUAL_BASE_URL}/datastores/{datastore_id}/documents"
     params = {"limit": limit}
     if cursor:
         params["cursor"] = cursor
-    
+
     headers = {
         "Authorization": f"Bearer {settings.CONTEXTUAL_API_KEY}",
         "Content-Type": "application/json"
     }
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
+    try:
+        documents = []
+        total_count = None
+        next_cursor = None
+
+        # Stream-parse the document list so we never hold raw bytes, a full
+        # JSON tree and pydantic objects in memory at the same time
+        async with app.state.http.stream("GET", url, headers=headers, params=params, timeout=30.0) as response:
             response.raise_for_status()
-            
-            data = response.json()
-            
-            # Transform Contextual documents to our format
-            documents = []
-            for doc in data.get("documents", []):
-                documents.append(DocumentInfo(
-                    id=doc.get("id", ""),
-                    name=doc.get("name", "Unknown"),
-                    type=doc.get("type", "document"),
-                    size=doc.get("size", 0),
-                    size_formatted=f"{doc.get('size', 0) / 1024:.1f} KB" if doc.get('size') else "Unknown",
-                    status=doc.get("ingestion_status", "completed"),
-                    created_at=doc.get("created_at", datetime.now().isoformat()),
-                    updated_at=doc.get("updated_at", datetime.now().isoformat())
-                ))
-            
-            return {
-                "success": True,
-                "documents": [doc.dict() for doc in documents],
-                "total": data.get("total_count", len(documents)),
-                "error": None,
-                "next_cursor": data.get("next_cursor")
-            }
-            
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Contextual API error: {e.response.status_code}")
-            return {
-                "success": False,
-                "documents": [],
-                "total": 0,
-                "error": f"API Error: {e.response.status_code}"
-            }
-        except Exception as e:
-            logger.error(f"Error fetching documents: {e}")
-            return {
-                "success": False,
-                "documents": [],
-                "total": 0,
-                "error": str(e)
-            }
+
+            current = None
+            async for prefix, event, value in ijson.parse(_AiterReader(response.aiter_bytes())):
+                if prefix == "documents.item":
+                    if event == "start_map":
+                        current = {}
+                    elif event == "end_map":
+                        documents.append({
+                            "id": current.get("id", ""),
+                            "name": current.get("name", "Unknown"),
+                            "type": current.get("type", "document"),
+                            "size": current.get("size", 0),
+                            "size_formatted": f"{current.get('size', 0) / 1024:.1f} KB" if current.get('size') else "Unknown",
+                            "status": current.get("ingestion_status", "completed"),
+                            "created_at": current.get("created_at", datetime.now().isoformat()),
+                            "updated_at": current.get("updated_at", datetime.now().isoformat())
+                        })
+                        current = None
+                elif current is not None and prefix.startswith("documents.item."):
+                    if event in ("string", "number", "boolean"):
+                        current[prefix[15:]] = value  # strip "documents.item."
+                elif prefix == "total_count" and event == "number":
+                    total_count = value
+                elif prefix == "next_cursor" and event == "string":
+                    next_cursor = value
+
+        result = {
+            "success": True,
+            "documents": documents,
+            "total": total_count if total_count is not None else len(documents),
+            "error": None,
+            "next_cursor": next_cursor
+        }
+        await storage.cache_set(cache_key, orjson.dumps(result), DOCUMENTS_CACHE_TTL)
+        return result
+
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Contextual API error: {e.response.status_code}")
+        return {
+            "success": False,
+            "documents": [],
+            "total": 0,
+            "error": f"API Error: {e.response.status_code}"
+        }
+    except Exception as e:
+        logger.error(f"Error fetching documents: {e}")
+        return {
+            "success": False,
+            "documents": [],
+            "total": 0,
+            "error": str(e)
+        }
 
 @app.delete("/api/documents/{doc_id}")
 async def delete_document(doc_id: str):
     """Delete a document."""
-    if doc_id not in documents_store:
+    if not await app.state.storage.delete_document(doc_id):
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    del documents_store[doc_id]
-    
+
     return {"success": True, "message": "Document deleted"}
 
 @app.post("/api/ingest/contextual/batch")
@@ -413,82 +760,128 @@ async def ingest_documents(
     Returns SSE stream with progress updates.
     """
     async def generate():
-        processor = PDFProcessor()
-        uploader = ContextualUploader()
-        
+        processor = app.state.pdf_processor
+        uploader = app.state.uploader
+        loop = asyncio.get_running_loop()
+        executor = app.state.executor
+        _INGEST_TMP_DIR.mkdir(parents=True, exist_ok=True)
+
+        max_bytes = settings.MAX_PDF_SIZE_MB * 1024 * 1024
+
         for i, file in enumerate(files):
+            temp_path = None
             try:
                 # Yield progress
-                yield f"data: {json.dumps({'phase': 'processing', 'file': file.filename, 'progress': i/len(files)})}\n\n"
-                
-                # Save file temporarily
-                temp_path = Path(f"/tmp/{file.filename}")
-                content = await file.read()
-                temp_path.write_bytes(content)
+                yield _sse({'phase': 'processing', 'file': file.filename, 'progress': i/len(files)})
+
+                # Reject unsupported types and oversized uploads before any
+                # bytes touch disk or a Gemini call is wasted on them
+                suffix = Path(file.filename or "").suffix.lower()
+                if suffix not in settings.ALLOWED_UPLOAD_EXTENSIONS:
+                    yield _sse({'phase': 'error', 'file': file.filename, 'error': f"Unsupported file type: {suffix or 'unknown'}"})
+                    continue
+                if file.size is not None and file.size > max_bytes:
+                    yield _sse({'phase': 'error', 'file': file.filename, 'error': f"File exceeds {settings.MAX_PDF_SIZE_MB} MB limit"})
+                    continue
+
+                # mkstemp keeps the name unguessable and unique, so concurrent
+                # uploads of the same filename can't clobber each other
+                fd, tmp_name = tempfile.mkstemp(
+                    suffix=Path(file.filename or "upload").suffix,
+                    dir=_INGEST_TMP_DIR
+                )
+                os.close(fd)
+                temp_path = Path(tmp_name)
+
+                # Stream the upload to disk in chunks - peak memory stays at one
+                # chunk instead of the whole file
+                size = 0
+                async with aiofiles.open(temp_path, "wb") as out:
+                    while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > max_bytes:
+                            # Content-Length can lie; enforce against real bytes
+                            raise ValueError(f"File exceeds {settings.MAX_PDF_SIZE_MB} MB limit")
+                        await out.write(chunk)
                 
                 # Process based on file type
                 if file.filename.endswith('.pdf'):
                     # Extract with Gemini
-                    yield f"data: {json.dumps({'phase': 'extracting', 'file': file.filename})}\n\n"
-                    result = processor.process_pdf(str(temp_path))
+                    yield _sse({'phase': 'extracting', 'file': file.filename})
+                    result = await loop.run_in_executor(
+                        executor, processor.process_pdf, str(temp_path)
+                    )
                     
                     if result["success"]:
                         # Upload to Contextual
-                        yield f"data: {json.dumps({'phase': 'uploading', 'file': file.filename})}\n\n"
-                        upload_result = uploader.upload_document(
-                            content=result["extracted_text"],
-                            filename=file.filename,
-                            metadata=result["metadata"]
+                        yield _sse({'phase': 'uploading', 'file': file.filename})
+                        upload_result = await loop.run_in_executor(
+                            executor,
+                            functools.partial(
+                                uploader.upload_document,
+                                content=result["extracted_text"],
+                                filename=file.filename,
+                                metadata=result["metadata"]
+                            )
                         )
                         
                         if upload_result["success"]:
                             # Store document info
                             doc_id = str(uuid.uuid4())
-                            documents_store[doc_id] = DocumentInfo(
+                            await app.state.storage.put_document(DocumentInfo(
                                 id=doc_id,
                                 name=file.filename,
                                 type="pdf",
-                                size=len(content),
-                                size_formatted=f"{len(content) / 1024:.1f} KB",
+                                size=size,
+                                size_formatted=f"{size / 1024:.1f} KB",
                                 status="completed",
                                 created_at=datetime.now().isoformat(),
                                 updated_at=datetime.now().isoformat()
-                            )
-                            yield f"data: {json.dumps({'phase': 'completed', 'file': file.filename, 'doc_id': doc_id})}\n\n"
+                            ))
+                            yield _sse({'phase': 'completed', 'file': file.filename, 'doc_id': doc_id})
                         else:
-                            yield f"data: {json.dumps({'phase': 'error', 'file': file.filename, 'error': upload_result['error']})}\n\n"
+                            yield _sse({'phase': 'error', 'file': file.filename, 'error': upload_result['error']})
                     else:
-                        yield f"data: {json.dumps({'phase': 'error', 'file': file.filename, 'error': result['error']})}\n\n"
+                        yield _sse({'phase': 'error', 'file': file.filename, 'error': result['error']})
                 else:
                     # For non-PDF files, direct upload
-                    yield f"data: {json.dumps({'phase': 'uploading', 'file': file.filename})}\n\n"
-                    upload_result = uploader.upload_document(
-                        content=content.decode('utf-8', errors='ignore'),
-                        filename=file.filename,
-                        metadata={"type": file.content_type}
+                    yield _sse({'phase': 'uploading', 'file': file.filename})
+                    async with aiofiles.open(temp_path, "rb") as f:
+                        content = await f.read()
+                    upload_result = await loop.run_in_executor(
+                        executor,
+                        functools.partial(
+                            uploader.upload_document,
+                            content=content.decode('utf-8', errors='ignore'),
+                            filename=file.filename,
+                            metadata={"type": file.content_type}
+                        )
                     )
                     
                     if upload_result["success"]:
                         doc_id = str(uuid.uuid4())
-                        documents_store[doc_id] = DocumentInfo(
+                        await app.state.storage.put_document(DocumentInfo(
                             id=doc_id,
                             name=file.filename,
                             type=file.content_type or "unknown",
-                            size=len(content),
-                            size_formatted=f"{len(content) / 1024:.1f} KB",
+                            size=size,
+                            size_formatted=f"{size / 1024:.1f} KB",
                             status="completed",
                             created_at=datetime.now().isoformat(),
                             updated_at=datetime.now().isoformat()
-                        )
-                        yield f"data: {json.dumps({'phase': 'completed', 'file': file.filename, 'doc_id': doc_id})}\n\n"
-                
-                # Clean up
-                temp_path.unlink(missing_ok=True)
+                        ))
+                        yield _sse({'phase': 'completed', 'file': file.filename, 'doc_id': doc_id})
                 
             except Exception as e:
-                yield f"data: {json.dumps({'phase': 'error', 'file': file.filename, 'error': str(e)})}\n\n"
+                yield _sse({'phase': 'error', 'file': file.filename, 'error': str(e)})
+            finally:
+                # Guaranteed cleanup, even when processing raised mid-file
+                if temp_path is not None:
+                    temp_path.unlink(missing_ok=True)
         
-        yield f"data: {json.dumps({'phase': 'batch_complete', 'total': len(files)})}\n\n"
+        # New documents exist - invalidate cached /api/documents listings
+        await app.state.storage.bump_docs_version()
+        yield _sse({'phase': 'batch_complete', 'total': len(files)})
     
     return StreamingResponse(
         generate(),
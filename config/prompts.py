@@ -79,4 +79,22 @@ PROMPTS = {
     
     Return as structured JSON.
     """
-}
\ No newline at end of file
+}
+
+# Single-call variant: extraction plus a metadata trailer, so ingestion only
+# uploads and processes the PDF once instead of paying for a second call
+PROMPTS["combined_extraction"] = PROMPTS["document_extraction"] + """
+    After the closing </document> tag, append the document metadata as JSON
+    wrapped in a <metadata_json> tag:
+
+    <metadata_json>
+    {
+        "title": "Document title",
+        "type": "report, manual, guide, etc.",
+        "topics": ["key topics/subjects covered"],
+        "Date": "date if available",
+        "Author/Organization": "author/organization if available",
+        "Summary": "2-3 sentence summary"
+    }
+    </metadata_json>
+    """
\ No newline at end of file
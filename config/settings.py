@@ -15,6 +15,9 @@ class Settings:
     CONTEXTUAL_DATASTORE_ID = os.getenv("CONTEXTUAL_DATASTORE_ID")
     CONTEXTUAL_BASE_URL = "https://api.contextual.ai/v1"
     
+    # Storage Configuration
+    REDIS_URL = os.getenv("REDIS_URL")  # Falls back to in-memory storage if unset
+
     # Application Settings
     DEBUG = os.getenv("DEBUG", "false").lower() == "true"
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -22,6 +25,8 @@ class Settings:
     # File Processing Settings
     MAX_PDF_SIZE_MB = 50
     MAX_PAGES = 1000
+    UPLOAD_CHUNK_SIZE = 1024 * 1024  # bytes per read when streaming uploads to disk
+    ALLOWED_UPLOAD_EXTENSIONS = {".pdf", ".txt", ".md", ".html", ".csv", ".json"}
     
     # Streaming Settings
     STREAM_CHUNK_SIZE = 1024
@@ -29,5 +34,10 @@ class Settings:
     
     # Feature Flags
     ENABLE_VALIDATION = os.getenv("ENABLE_VALIDATION", "true").lower() == "true"
+    # gzip document uploads to Contextual. Off by default: per-part
+    # Content-Encoding on multipart uploads is non-standard and a server
+    # that ignores it would store raw gzip bytes. Enable only after
+    # verifying a round-trip against the real API
+    CONTEXTUAL_GZIP_UPLOADS = os.getenv("CONTEXTUAL_GZIP_UPLOADS", "false").lower() == "true"
 
 settings = Settings()
\ No newline at end of file
@@ -17,10 +17,12 @@ console = Console()
 
 def main():
     parser = argparse.ArgumentParser(description="Ingest a PDF document into Contextual AI")
-    parser.add_argument("pdf_path", help="Path to the PDF file to ingest")
+    parser.add_argument("pdf_path", help="Path to a PDF file or a directory of PDFs to ingest")
     parser.add_argument("--no-thinking", action="store_true", help="Don't display Gemini's thinking process")
     parser.add_argument("--skip-upload", action="store_true", help="Only process, don't upload to Contextual")
-    
+    parser.add_argument("--batch", action="store_true",
+                        help="Process directories through Gemini Batch Mode (asynchronous, ~half the token cost)")
+
     args = parser.parse_args()
     
     # Validate PDF path
@@ -29,6 +31,14 @@ def main():
         console.print(f"[red]Error: File not found: {pdf_path}[/red]")
         sys.exit(1)
     
+    # Directory mode: process PDFs concurrently, then upload in order
+    if pdf_path.is_dir():
+        ingest_directory(pdf_path, skip_upload=args.skip_upload, batch=args.batch)
+        return
+
+    if args.batch:
+        console.print("[yellow]--batch only applies to directories, processing interactively[/yellow]")
+
     console.print(Panel.fit(
         f"[bold cyan]Document Ingestion Pipeline[/bold cyan]\n"
         f"File: {pdf_path.name}",
@@ -94,5 +104,47 @@ def main():
         console.print(f"\n[red]Error during ingestion:[/red] {str(e)}")
         sys.exit(1)
 
+def ingest_directory(directory: Path, skip_upload: bool = False, batch: bool = False):
+    """Ingest every PDF in a directory, overlapping the Gemini calls.
+
+    With batch=True the PDFs go through Gemini Batch Mode instead, which
+    trades interactive latency for roughly half the token cost.
+    """
+    pdf_files = sorted(directory.glob("*.pdf"))
+    if not pdf_files:
+        console.print(f"[red]Error: No PDF files found in {directory}[/red]")
+        sys.exit(1)
+
+    console.print(Panel.fit(
+        f"[bold cyan]Document Ingestion Pipeline[/bold cyan]\n"
+        f"Directory: {directory} ({len(pdf_files)} PDFs)",
+        border_style="cyan"
+    ))
+
+    try:
+        processor = PDFProcessor()
+        if batch:
+            results = processor.process_pdfs(pdf_files)
+        else:
+            results = processor.process_many(pdf_files)
+
+        output_dir = Path("extracted_texts")
+        output_dir.mkdir(exist_ok=True)
+
+        uploader = None if skip_upload else ContextualUploader()
+        for pdf_file, (content, metadata) in zip(pdf_files, results):
+            output_file = output_dir / f"{pdf_file.stem}_extracted.xml"
+            output_file.write_text(content, encoding="utf-8")
+            console.print(f"[green]✓[/green] {pdf_file.name} -> {output_file}")
+
+            if uploader:
+                uploader.upload_document(content, metadata)
+
+        console.print(f"\n[bold green]✓ Ingested {len(pdf_files)} documents![/bold green]")
+
+    except Exception as e:
+        console.print(f"\n[red]Error during ingestion:[/red] {str(e)}")
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
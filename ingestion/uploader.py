@@ -1,7 +1,9 @@
+import gzip
+import html
 import httpx
+import io
 import json
-import tempfile
-import os
+import random
 from typing import Dict, Any, Optional
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
@@ -9,8 +11,33 @@ import time
 
 from config import settings
 
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+except ImportError:  # orjson is in requirements, but stdlib json works too
+    def _json_loads(data):
+        return json.loads(data)
+
 console = Console()
 
+# Upload payload template; values are HTML-escaped before substitution so
+# quotes or angle brackets in titles/summaries can't break the document
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <title>{title}</title>
+    <meta name="author" content="{author}">
+    <meta name="date" content="{date}">
+    <meta name="description" content="{description}">
+</head>
+<body>
+    <h1>{title}</h1>
+    <pre>{content}</pre>
+</body>
+</html>"""
+
 class ContextualUploader:
     """Upload processed documents to Contextual AI."""
     
@@ -27,7 +54,26 @@ class ContextualUploader:
         self.headers = {
             "Authorization": f"Bearer {self.api_key}"
         }
-    
+        # One persistent client for every call so the status polling loop
+        # reuses a single TCP+TLS connection instead of handshaking per poll
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=httpx.Timeout(120.0),
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=16)
+        )
+
+    def close(self):
+        """Close the underlying HTTP client."""
+        self.client.close()
+
+    def __del__(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
     def upload_document(self, 
                        content: str, 
                        metadata: Dict[str, Any],
@@ -46,21 +92,16 @@ class ContextualUploader:
         console.print(f"\n[bold cyan]Uploading to Contextual AI[/bold cyan]")
         console.print(f"[dim]Datastore ID: {self.datastore_id}[/dim]")
         
-        # Create a temporary HTML file with the content and metadata
+        # Build the HTML payload from the shared template with everything
+        # escaped exactly once
         # Using HTML format as it's supported and preserves formatting better
-        html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>{metadata.get("title", "Untitled Document")}</title>
-    <meta name="author" content="{metadata.get("Author/Organization", "")}">
-    <meta name="date" content="{metadata.get("Date", "")}">
-    <meta name="description" content="{metadata.get("Summary", "")}">
-</head>
-<body>
-    <h1>{metadata.get("title", "Untitled Document")}</h1>
-    <pre>{content}</pre>
-</body>
-</html>"""
+        html_content = _HTML_TEMPLATE.format_map({
+            "title": html.escape(str(metadata.get("title", "Untitled Document"))),
+            "author": html.escape(str(metadata.get("Author/Organization", ""))),
+            "date": html.escape(str(metadata.get("Date", ""))),
+            "description": html.escape(str(metadata.get("Summary", ""))),
+            "content": html.escape(content)
+        })
         
         with Progress(
             SpinnerColumn(),
@@ -70,26 +111,33 @@ class ContextualUploader:
             task = progress.add_task("Uploading document...", total=None)
             
             # Upload document
-            url = f"{self.base_url}/datastores/{self.datastore_id}/documents"
-            
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as tmp_file:
-                tmp_file.write(html_content)
-                tmp_file_path = tmp_file.name
-            
+            url = f"/datastores/{self.datastore_id}/documents"
+
             try:
-                # Upload as multipart form data
-                with open(tmp_file_path, 'rb') as f:
-                    files = {'file': (f'{metadata.get("title", "document")}.html', f, 'text/html')}
-                    
-                    with httpx.Client(timeout=120.0) as client:
-                        response = client.post(
-                            url,
-                            headers=self.headers,
-                            files=files
-                        )
-                        response.raise_for_status()
-                        result = response.json()
+                filename = f'{metadata.get("title", "document")}.html'
+                if settings.CONTEXTUAL_GZIP_UPLOADS:
+                    # Extracted-document HTML compresses 5-10x, which cuts
+                    # the bytes sent over TLS by the same factor — but
+                    # per-part Content-Encoding is non-standard, and a server
+                    # that ignores it would store raw gzip bytes. Opt-in via
+                    # settings once verified against the deployment
+                    body = gzip.compress(html_content.encode('utf-8'), compresslevel=6)
+                    files = {'file': (
+                        filename,
+                        io.BytesIO(body),
+                        'text/html',
+                        {'Content-Encoding': 'gzip'}
+                    )}
+                else:
+                    files = {'file': (
+                        filename,
+                        io.BytesIO(html_content.encode('utf-8')),
+                        'text/html'
+                    )}
+
+                response = self.client.post(url, files=files)
+                response.raise_for_status()
+                result = _json_loads(response.content)
                 
                 document_id = result.get("document_id", result.get("id"))
                 progress.update(task, description=f"[green]Upload successful![/green] Document ID: {document_id}")
@@ -112,10 +160,6 @@ class ContextualUploader:
             except Exception as e:
                 console.print(f"[red]Upload error:[/red] {str(e)}")
                 raise
-            finally:
-                # Clean up temp file
-                if os.path.exists(tmp_file_path):
-                    os.unlink(tmp_file_path)
     
     def _wait_for_ingestion(self, 
                            document_id: str, 
@@ -135,20 +179,27 @@ class ContextualUploader:
             Final ingestion status
         """
         start_time = time.time()
-        
+        # Exponential backoff: fast ingestions finish within a couple of
+        # cheap early polls, slow ones settle into an 8s cadence instead of
+        # hammering the API every 2s
+        delay = 0.5
+        max_delay = 8.0
+
         while time.time() - start_time < max_wait:
             # Check document status
             status = self._check_document_status(document_id)
-            
+
             if status in ["completed", "failed", "error"]:
                 return status
-            
+
             # Update progress with current status
             elapsed = int(time.time() - start_time)
             progress.update(task, description=f"Ingestion in progress... ({elapsed}s)")
-            
-            time.sleep(2)  # Poll every 2 seconds
-        
+
+            # Jitter avoids polling in lockstep when several uploads run
+            time.sleep(delay + random.uniform(0, 0.25))
+            delay = min(max_delay, delay * 2)
+
         return "timeout"
     
     def _check_document_status(self, document_id: str) -> str:
@@ -161,17 +212,16 @@ class ContextualUploader:
         Returns:
             Document status
         """
-        url = f"{self.base_url}/datastores/{self.datastore_id}/documents/{document_id}"
-        
+        url = f"/datastores/{self.datastore_id}/documents/{document_id}"
+
         try:
-            with httpx.Client(timeout=10.0) as client:
-                response = client.get(url, headers=self.headers)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("status", "unknown")
-                
-                return "checking"
+            response = self.client.get(url, timeout=10.0)
+
+            if response.status_code == 200:
+                data = _json_loads(response.content)
+                return data.get("status", "unknown")
+
+            return "checking"
         except:
             return "checking"
     
@@ -185,18 +235,13 @@ class ContextualUploader:
         Returns:
             List of documents
         """
-        url = f"{self.base_url}/datastores/{self.datastore_id}/documents"
+        url = f"/datastores/{self.datastore_id}/documents"
         params = {"limit": limit}
-        
+
         try:
-            with httpx.Client(timeout=30.0) as client:
-                response = client.get(
-                    url,
-                    headers=self.headers,
-                    params=params
-                )
-                response.raise_for_status()
-                return response.json()
+            response = self.client.get(url, params=params, timeout=30.0)
+            response.raise_for_status()
+            return _json_loads(response.content)
         except Exception as e:
             console.print(f"[red]Failed to list documents:[/red] {str(e)}")
             return {"documents": [], "error": str(e)}
\ No newline at end of file
@@ -4,18 +4,33 @@ Simple CLI for querying Contextual AI - no extra features, just query and respon
 Usage: python simple_cli.py
 """
 
-import asyncio
-import httpx
 import json
+import re
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
-from rich.markdown import Markdown
+
+# httpx (and its TLS stack) is only needed once the first query fires, so it
+# is imported lazily to keep CLI startup snappy
+httpx = None
 
 from config import settings
 
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+except ImportError:  # orjson is in requirements, but stdlib json works too
+    def _json_loads(data):
+        return json.loads(data)
+
 console = Console()
 
+# Responses larger than this are printed as plain text: Markdown() re-parses
+# every character, which dominates the print path for multi-KB answers
+MARKDOWN_RENDER_LIMIT = 8192
+
 class SimpleContextualCLI:
     """Simple client for Contextual AI queries."""
     
@@ -29,14 +44,48 @@ class SimpleContextualCLI:
             "Content-Type": "application/json"
         }
         self.conversation_id = None
-    
-    async def query(self, text: str) -> str:
+        # Cache of normalized query -> response, used only outside a
+        # conversation where repeated questions are safe to replay
+        self._query_cache = {}
+        # Created lazily on first query and reused so every turn shares one
+        # TCP+TLS connection instead of handshaking per request
+        self._client = None
+
+    def _get_client(self) -> "httpx.Client":
+        """Return the shared HTTP client, creating it on first use."""
+        global httpx
+        if httpx is None:
+            import httpx
+        if self._client is None:
+            self._client = httpx.Client(timeout=60.0, http2=True)
+        return self._client
+
+    def close(self):
+        """Close the shared HTTP client if it was created."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    @staticmethod
+    def _normalize_query(text: str) -> str:
+        """Normalize a query so trivial rephrasings share a cache key."""
+        return re.sub(r"[^\w\s]", "", text.lower()).strip()
+
+    def query(self, text: str) -> str:
         """
         Send query to Contextual and get response.
         Simple, no streaming, just request/response.
         """
+        # Answer repeated stateless queries from the cache instead of
+        # paying another API round-trip
+        cache_key = None
+        if self.conversation_id is None:
+            cache_key = self._normalize_query(text)
+            if cache_key in self._query_cache:
+                return self._query_cache[cache_key]
+
         url = f"{self.base_url}/agents/{self.agent_id}/query"
-        
+
         # Simple payload - just the message
         payload = {
             "messages": [{"role": "user", "content": text}],
@@ -48,28 +97,31 @@ class SimpleContextualCLI:
             payload["conversation_id"] = self.conversation_id
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                # Save conversation ID for context
-                if "conversation_id" in data:
-                    self.conversation_id = data["conversation_id"]
-                
-                # Extract and return the response
-                if "message" in data and "content" in data["message"]:
-                    return data["message"]["content"]
-                else:
-                    return "No response content"
-                    
+            client = self._get_client()
+            response = client.post(url, headers=self.headers, json=payload)
+            response.raise_for_status()
+
+            data = _json_loads(response.content)
+
+            # Save conversation ID for context
+            if "conversation_id" in data:
+                self.conversation_id = data["conversation_id"]
+
+            # Extract and return the response
+            if "message" in data and "content" in data["message"]:
+                content = data["message"]["content"]
+                if cache_key:
+                    self._query_cache[cache_key] = content
+                return content
+            else:
+                return "No response content"
+
         except httpx.HTTPStatusError as e:
             return f"API Error: {e.response.status_code} - {e.response.text}"
         except Exception as e:
             return f"Error: {str(e)}"
 
-async def main():
+def main():
     """Main loop - just query and display response."""
     console.print(Panel.fit(
         "[bold cyan]Simple Contextual Query CLI[/bold cyan]\n"
@@ -78,30 +130,37 @@ async def main():
     ))
     
     cli = SimpleContextualCLI()
-    
-    while True:
-        # Get query
-        query = Prompt.ask("\n[bold cyan]Query[/bold cyan]")
-        
-        if query.lower() == 'exit':
-            console.print("[yellow]Goodbye![/yellow]")
-            break
-        
-        if query.lower() == 'reset':
-            cli.conversation_id = None
-            console.print("[yellow]Conversation reset[/yellow]")
-            continue
-        
-        # Send query and get response
-        console.print("\n[dim]Querying...[/dim]")
-        response = await cli.query(query)
-        
-        # Display response
-        console.print("\n[bold green]Response:[/bold green]")
-        console.print(Markdown(response))
+
+    try:
+        while True:
+            # Get query
+            query = Prompt.ask("\n[bold cyan]Query[/bold cyan]")
+
+            if query.lower() == 'exit':
+                console.print("[yellow]Goodbye![/yellow]")
+                break
+
+            if query.lower() == 'reset':
+                cli.conversation_id = None
+                console.print("[yellow]Conversation reset[/yellow]")
+                continue
+
+            # Send query and get response
+            console.print("\n[dim]Querying...[/dim]")
+            response = cli.query(query)
+
+            # Display response
+            console.print("\n[bold green]Response:[/bold green]")
+            if len(response) > MARKDOWN_RENDER_LIMIT:
+                console.print(response, markup=False)
+            else:
+                from rich.markdown import Markdown
+                console.print(Markdown(response))
+    finally:
+        cli.close()
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        main()
     except KeyboardInterrupt:
         console.print("\n[yellow]Interrupted[/yellow]")
\ No newline at end of file
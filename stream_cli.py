@@ -7,18 +7,33 @@ Usage: python stream_cli.py
 import asyncio
 import httpx
 import json
-from rich.console import Console
+import time
+from rich.console import Console, Group
 from rich.prompt import Prompt
 from rich.panel import Panel
 from rich.live import Live
 from rich.markdown import Markdown
 from rich.table import Table
+from rich.text import Text
 
 from config import settings
 from validation import GeminiValidator
 
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+except ImportError:  # orjson is in requirements, but stdlib json works too
+    def _json_loads(data):
+        return json.loads(data)
+
 console = Console()
 
+def _trunc(s: str, n: int) -> str:
+    """Truncate a display string to n chars with a trailing ellipsis."""
+    return s if len(s) <= n else f"{s[:n - 3]}..."
+
 class StreamingContextualCLI:
     """Streaming client for Contextual AI."""
     
@@ -32,7 +47,14 @@ class StreamingContextualCLI:
             "Content-Type": "application/json"
         }
         self.conversation_id = None
-    
+        # One client for the whole session: every query reuses the TLS
+        # connection (and multiplexes over HTTP/2) instead of re-handshaking
+        self.client = httpx.AsyncClient(timeout=60.0, http2=True, headers=self.headers)
+
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        await self.client.aclose()
+
     async def stream_query(self, text: str):
         """
         Stream query response from Contextual.
@@ -52,59 +74,84 @@ class StreamingContextualCLI:
         if self.conversation_id:
             payload["conversation_id"] = self.conversation_id
         
-        full_response = ""
-        groundedness_scores = []
-        retrievals = []
-        
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                async with client.stream("POST", url, headers=self.headers, json=payload) as response:
-                    response.raise_for_status()
-                    
-                    # Process server-sent events
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]  # Remove "data: " prefix
-                            
-                            # Check for end of stream
-                            if data_str == "[DONE]":
-                                break
+            async with self.client.stream("POST", url, json=payload) as response:
+                response.raise_for_status()
+                
+                # Process server-sent events with an incremental byte
+                # buffer: aiter_lines() would decode and re-split every
+                # chunk, which goes quadratic on large SSE payloads
+                buf = bytearray()
+                done = False
+                async for chunk in response.aiter_bytes():
+                    buf.extend(chunk)
+                    while True:
+                        i = buf.find(b"\n")
+                        if i < 0:
+                            break
+                        line = bytes(buf[:i]).decode("utf-8", "replace").rstrip("\r")
+                        del buf[:i + 1]
+
+                        # Split on the first colon instead of
+                        # prefix-scanning and re-slicing every line
+                        field, sep, value = line.partition(":")
+                        if field != "data" or not sep:
+                            continue
+                        data_str = value[1:] if value.startswith(" ") else value
+
+                        # Check for end of stream
+                        if data_str == "[DONE]":
+                            done = True
+                            break
+
+                        try:
+                            data = _json_loads(data_str)
+
+                            # Dispatch on the event type once; the old
+                            # chain of independent ifs compared every frame
+                            # against all four types even after a match
+                            match data.get("event", ""):
+                                case "message_delta":
+                                    event_data = data.get("data", {})
+                                    if "delta" in event_data:
+                                        yield ("delta", event_data["delta"])
+                                case "metadata":
+                                    event_data = data.get("data", {})
+                                    if "conversation_id" in event_data:
+                                        self.conversation_id = event_data["conversation_id"]
+                                case "groundedness_scores":
+                                    event_data = data.get("data", {})
+                                    if "scores" in event_data:
+                                        yield ("groundedness", event_data["scores"])
+                                case "retrievals":
+                                    event_data = data.get("data", {})
+                                    if "contents" in event_data:
+                                        yield ("retrievals", event_data["contents"])
+
+                        except ValueError:
+                            # Skip invalid JSON chunks
+                            continue
+
+                    if done:
+                        break
                             
-                            try:
-                                data = json.loads(data_str)
-                                
-                                # Handle different event types
-                                event_type = data.get("event", "")
-                                event_data = data.get("data", {})
-                                
-                                # Save conversation ID from metadata
-                                if event_type == "metadata" and "conversation_id" in event_data:
-                                    self.conversation_id = event_data["conversation_id"]
-                                
-                                # Collect message deltas
-                                if event_type == "message_delta" and "delta" in event_data:
-                                    full_response += event_data["delta"]
-                                    yield ("delta", event_data["delta"])
-                                
-                                # Capture groundedness scores
-                                if event_type == "groundedness_scores" and "scores" in event_data:
-                                    groundedness_scores = event_data["scores"]
-                                    yield ("groundedness", groundedness_scores)
-                                
-                                # Capture retrieval contents
-                                if event_type == "retrievals" and "contents" in event_data:
-                                    retrievals = event_data["contents"]
-                                    yield ("retrievals", retrievals)
-                                        
-                            except json.JSONDecodeError:
-                                # Skip invalid JSON chunks
-                                continue
-                                
         except httpx.HTTPStatusError as e:
             yield ("error", f"API Error: {e.response.status_code}")
         except Exception as e:
             yield ("error", f"Error: {str(e)}")
 
+async def _pump_events(stream, queue: asyncio.Queue):
+    """Drain an event stream into a queue; None marks the end of the stream.
+
+    Running the network read as its own task means a slow terminal repaint
+    can't stop the TCP buffer from draining.
+    """
+    try:
+        async for item in stream:
+            await queue.put(item)
+    finally:
+        await queue.put(None)
+
 async def main():
     """Main loop with streaming responses."""
     console.print(Panel.fit(
@@ -116,148 +163,236 @@ async def main():
     cli = StreamingContextualCLI()
     validator = GeminiValidator()
     validate_responses = True  # Validation enabled by default
-    
-    while True:
-        # Get query
-        query = Prompt.ask("\n[bold cyan]Query[/bold cyan]")
-        
-        if query.lower() == 'exit':
-            console.print("[yellow]Goodbye![/yellow]")
-            break
-        
-        if query.lower() == 'reset':
-            cli.conversation_id = None
-            console.print("[yellow]Conversation reset[/yellow]")
-            continue
+
+    try:
+        while True:
+            # Get query
+            query = Prompt.ask("\n[bold cyan]Query[/bold cyan]")
         
-        if query.lower() == 'validate off':
-            validate_responses = False
-            console.print("[yellow]Validation disabled[/yellow]")
-            continue
+            if query.lower() == 'exit':
+                console.print("[yellow]Goodbye![/yellow]")
+                break
         
-        if query.lower() == 'validate on':
-            validate_responses = True
-            console.print("[green]Validation enabled[/green]")
-            continue
+            if query.lower() == 'reset':
+                cli.conversation_id = None
+                console.print("[yellow]Conversation reset[/yellow]")
+                continue
         
-        # Stream response with live display
-        console.print("\n[bold green]Response:[/bold green]")
-        full_response = ""
-        retrievals = []
+            if query.lower() == 'validate off':
+                validate_responses = False
+                console.print("[yellow]Validation disabled[/yellow]")
+                continue
         
-        with Live("", console=console, refresh_per_second=4) as live:
-            async for event_type, data in cli.stream_query(query):
-                if event_type == "delta":
-                    # Accumulate response text
-                    full_response += data
-                    # Update display with markdown formatting
-                    live.update(Markdown(full_response))
-                elif event_type == "retrievals":
-                    # Store retrieval sources
-                    retrievals = data
+            if query.lower() == 'validate on':
+                validate_responses = True
+                console.print("[green]Validation enabled[/green]")
+                continue
         
-        # Display citations/sources
-        if retrievals:
-            console.print("\n[bold cyan]📚 Sources/Citations:[/bold cyan]")
-            for i, ret in enumerate(retrievals[:5], 1):  # Show top 5 sources
-                doc_name = ret.get('doc_name', 'Unknown document')
-                page = ret.get('page', 'N/A')
-                score = ret.get('score', 0)
-                
-                # Truncate long document names
-                if len(doc_name) > 50:
-                    doc_name = doc_name[:47] + "..."
-                
-                console.print(f"  [{i}] [yellow]{doc_name}[/yellow]")
-                console.print(f"      Page: {page} | Relevance: {score:.2%}")
-            
-            if len(retrievals) > 5:
-                console.print(f"  [dim]... and {len(retrievals) - 5} more sources[/dim]")
-        else:
-            console.print("\n[dim]No source citations available[/dim]")
+            # Stream response with live display. While streaming, deltas are
+            # appended to a plain Text object (O(delta) work per update); the
+            # Markdown parse happens exactly once, at stream end
+            console.print("\n[bold green]Response:[/bold green]")
+            # Deltas collect in a list and join once at stream end; repeated
+            # str += is quadratic in response length
+            response_parts = []
+            response_len = 0
+            retrievals = []
+            streamed = Text()
+            # Coalesce deltas and repaint at most every 100ms or 256 characters
+            last_render = 0.0
+            last_len = 0
+
+            # Producer/consumer split: the network read runs as its own task and
+            # this loop only consumes and renders
+            queue = asyncio.Queue(maxsize=256)
+            producer = asyncio.create_task(_pump_events(cli.stream_query(query), queue))
+
+            with Live(streamed, console=console, refresh_per_second=4, transient=True) as live:
+                while True:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout=0.1)
+                    except asyncio.TimeoutError:
+                        # Idle gap in the stream: flush anything unrendered
+                        if response_len != last_len:
+                            live.update(streamed)
+                            last_render = time.monotonic()
+                            last_len = response_len
+                        continue
+                    if item is None:
+                        break
+
+                    event_type, data = item
+                    if event_type == "delta":
+                        # Accumulate response text
+                        response_parts.append(data)
+                        response_len += len(data)
+                        streamed.append(data)
+                        now = time.monotonic()
+                        if now - last_render >= 0.1 or response_len - last_len > 256:
+                            live.update(streamed)
+                            last_render = now
+                            last_len = response_len
+                    elif event_type == "retrievals":
+                        # Store retrieval sources
+                        retrievals = data
+
+            await producer
+            full_response = "".join(response_parts)
+
+            # Single Markdown render of the finished response
+            if full_response:
+                console.print(Markdown(full_response))
         
-        # Run Gemini validation if enabled
-        if validate_responses and full_response:
-            console.print("\n[yellow]🔍 Validating response with Gemini...[/yellow]")
-            
-            # Prepare sources for validation
-            sources = []
-            if retrievals:
-                for ret in retrievals[:3]:  # Use top 3 sources for validation
-                    sources.append({
+            # Kick validation off before the sources are rendered: the genai
+            # stream is synchronous, so a worker thread drives it and feeds
+            # events into an asyncio queue. By the time the sources finish
+            # printing, the Gemini request is already in flight — its
+            # time-to-first-token overlaps the local display work
+            validation_queue = None
+            validation_task = None
+            if validate_responses and full_response:
+                # Prepare sources for validation (top 3). The validator only
+                # uses these to look up the extracted document by name, so
+                # there is no point slicing content_text into the payload
+                sources = [
+                    {
                         "doc_name": ret.get('doc_name', 'Unknown'),
-                        "page": ret.get('page', 'N/A'),
-                        "content": ret.get('content_text', '')[:500] if 'content_text' in ret else ''
-                    })
-            
-            # Stream validation with thinking visible
-            console.print("\n[dim italic]💭 Gemini's Thinking Process:[/dim italic]")
-            thinking_text = ""
-            validation_result = None
-            
-            with Live("", console=console, refresh_per_second=4) as live:
-                for event_type, content in validator.validate_response_stream(query, full_response, sources):
-                    if event_type == "thought":
-                        # Stream thinking process
-                        thinking_text += content
-                        live.update(Markdown(thinking_text))
-                    elif event_type == "answer":
-                        # JSON is being streamed but we'll wait for the final result
-                        pass
-                    elif event_type == "result":
-                        # Got the final parsed result
-                        validation_result = content
-                    elif event_type == "error":
-                        console.print(f"\n[red]Validation error: {content}[/red]")
+                        "page": ret.get('page', 'N/A')
+                    }
+                    for ret in retrievals[:3]
+                ]
+                validation_queue = asyncio.Queue()
+                loop = asyncio.get_running_loop()
+
+                def _drive_validation(queue=validation_queue, q=query, resp=full_response, srcs=sources):
+                    try:
+                        for item in validator.validate_response_stream(q, resp, srcs):
+                            loop.call_soon_threadsafe(queue.put_nowait, item)
+                    finally:
+                        loop.call_soon_threadsafe(queue.put_nowait, None)
+
+                validation_task = asyncio.create_task(asyncio.to_thread(_drive_validation))
+
+            # Display citations/sources
+            if retrievals:
+                console.print("\n[bold cyan]📚 Sources/Citations:[/bold cyan]")
+                for i, ret in enumerate(retrievals[:5], 1):  # Show top 5 sources
+                    doc_name = _trunc(ret.get('doc_name', 'Unknown document'), 50)
+                    page = ret.get('page', 'N/A')
+                    score = ret.get('score', 0)
+
+                    console.print(f"  [{i}] [yellow]{doc_name}[/yellow]")
+                    console.print(f"      Page: {page} | Relevance: {score:.2%}")
             
-            # Display validation results if we got them
-            if validation_result:
-                console.print("\n[bold magenta]✅ Validation Results:[/bold magenta]")
+                if len(retrievals) > 5:
+                    console.print(f"  [dim]... and {len(retrievals) - 5} more sources[/dim]")
+            else:
+                console.print("\n[dim]No source citations available[/dim]")
+        
+            # Consume validation events as the worker thread produces them
+            if validation_task is not None:
+                console.print("\n[yellow]🔍 Validating response with Gemini...[/yellow]")
+
+                # Stream validation with thinking visible. Thought chunks
+                # collect in a list and the Markdown re-parse is throttled to
+                # every 100ms or 256 new characters, same as the response
+                # stream; the final render happens once after the loop
+                console.print("\n[dim italic]💭 Gemini's Thinking Process:[/dim italic]")
+                thought_parts = []
+                thought_len = 0
+                last_render = 0.0
+                last_len = 0
+                validation_result = None
+
+                with Live("", console=console, refresh_per_second=4, transient=True) as live:
+                    while True:
+                        item = await validation_queue.get()
+                        if item is None:
+                            break
+                        event_type, content = item
+                        if event_type == "thought":
+                            # Stream thinking process
+                            thought_parts.append(content)
+                            thought_len += len(content)
+                            now = time.monotonic()
+                            if now - last_render >= 0.1 or thought_len - last_len > 256:
+                                live.update(Markdown("".join(thought_parts)))
+                                last_render = now
+                                last_len = thought_len
+                        elif event_type == "answer":
+                            # JSON is being streamed but we'll wait for the final result
+                            pass
+                        elif event_type == "result":
+                            # Got the final parsed result
+                            validation_result = content
+                        elif event_type == "error":
+                            console.print(f"\n[red]Validation error: {content}[/red]")
+
+                await validation_task
+
+                # Single Markdown render of the complete thinking trace
+                if thought_parts:
+                    console.print(Markdown("".join(thought_parts)))
+
+                # Display validation results if we got them
+                if validation_result:
+                    console.print("\n[bold magenta]✅ Validation Results:[/bold magenta]")
                 
-                # Query answered?
-                query_answered = validation_result.get('query_answered', False)
-                if query_answered:
-                    console.print(f"  [green]✅ Query Answered: YES[/green]")
-                else:
-                    console.print(f"  [red]❌ Query Answered: NO[/red]")
+                    # Query answered?
+                    query_answered = validation_result.get('query_answered', False)
+                    if query_answered:
+                        console.print(f"  [green]✅ Query Answered: YES[/green]")
+                    else:
+                        console.print(f"  [red]❌ Query Answered: NO[/red]")
                 
-                # Fact-by-fact checking
-                facts = validation_result.get('facts_checked', [])
-                if facts:
-                    console.print(f"\n[bold cyan]Fact Checking ({validation_result.get('verified_facts', 0)}/{validation_result.get('total_facts', 0)} verified):[/bold cyan]")
+                    # Fact-by-fact checking
+                    facts = validation_result.get('facts_checked', [])
+                    if facts:
+                        console.print(f"\n[bold cyan]Fact Checking ({validation_result.get('verified_facts', 0)}/{validation_result.get('total_facts', 0)} verified):[/bold cyan]")
                     
-                    for fact in facts:
-                        fact_text = fact.get('fact', '')
-                        verified = fact.get('verified', False)
-                        page = fact.get('page_found', '')
-                        
-                        if verified:
-                            icon = "✅"
-                            color = "green"
-                        else:
-                            icon = "❌"
-                            color = "red"
-                        
-                        # Truncate long facts for display
-                        if len(fact_text) > 80:
-                            fact_text = fact_text[:77] + "..."
-                        
-                        console.print(f"  {icon} [{color}]{fact_text}[/{color}]")
-                        if page:
-                            console.print(f"     [dim](Found on page {page})[/dim]")
+                        # One render for the whole list: printing each fact
+                        # (plus its page line) separately pays rich's layout
+                        # pass per call, which adds up over long fact lists
+                        rows = []
+                        for fact in facts:
+                            fact_text = fact.get('fact', '')
+                            verified = fact.get('verified', False)
+                            page = fact.get('page_found', '')
+
+                            if verified:
+                                icon = "✅"
+                                color = "green"
+                            else:
+                                icon = "❌"
+                                color = "red"
+
+                            rows.append(Text(f"  {icon} {_trunc(fact_text, 80)}", style=color))
+                            if page:
+                                rows.append(Text(f"     (Found on page {page})", style="dim"))
+                        console.print(Group(*rows))
                 
-                # Overall accuracy
-                accuracy = validation_result.get('accuracy_score', 0)
-                if accuracy >= 90:
-                    accuracy_color = "green"
-                elif accuracy >= 70:
-                    accuracy_color = "yellow"
-                else:
-                    accuracy_color = "red"
+                    # Overall accuracy
+                    accuracy = validation_result.get('accuracy_score', 0)
+                    if accuracy >= 90:
+                        accuracy_color = "green"
+                    elif accuracy >= 70:
+                        accuracy_color = "yellow"
+                    else:
+                        accuracy_color = "red"
                 
-                console.print(f"\n[bold]Overall Accuracy: [{accuracy_color}]{accuracy}%[/{accuracy_color}][/bold]")
+                    console.print(f"\n[bold]Overall Accuracy: [{accuracy_color}]{accuracy}%[/{accuracy_color}][/bold]")
 
+    finally:
+        await cli.aclose()
 if __name__ == "__main__":
+    try:
+        # libuv-backed loop cuts per-read syscall overhead on SSE streams
+        # with many small frames; the default loop is a fine fallback
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -3,6 +3,9 @@
 Gemini-based validation module for checking and validating Contextual AI responses.
 """
 
+import collections
+import functools
+import hashlib
 import json
 from typing import Dict, Any, List, Optional
 from pathlib import Path
@@ -12,96 +15,193 @@ import os
 
 from config import settings
 
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+except ImportError:  # orjson is in requirements, but stdlib json works too
+    def _json_loads(data):
+        return json.loads(data)
+
+@functools.lru_cache(maxsize=8)
+def _read_document_cached(path_str: str, mtime_ns: int) -> str:
+    """Read an extracted document, truncated to the 50k chars the prompts use.
+
+    Keyed on (path, mtime) so edits invalidate naturally. The read itself is
+    capped (60k bytes covers 50k chars even with some multi-byte sequences)
+    so a multi-MB XML never gets pulled into memory just to be sliced.
+    """
+    with open(path_str, 'rb') as f:
+        data = f.read(60000)
+    return data.decode('utf-8', 'replace')[:50000]
+
+
 class GeminiValidator:
     """Validate responses using Gemini."""
-    
-    def __init__(self):
-        """Initialize Gemini client."""
-        os.environ['GEMINI_API_KEY'] = settings.GEMINI_API_KEY
-        self.client = genai.Client()
-        self.model = settings.GEMINI_MODEL
-        self.extracted_texts_dir = Path("extracted_texts")
-    
-    def validate_response_stream(
-        self, 
-        query: str, 
-        response: str, 
-        sources: Optional[List[Dict[str, Any]]] = None,
-        use_full_document: bool = True
-    ):
-        """
-        Stream validation with thinking process visible.
-        Yields tuples of (type, content) where type is 'thought' or 'result'.
-        """
-        
-        # Try to load the full extracted document if available
-        full_document = None
-        if use_full_document:
-            full_document = self._load_extracted_document(sources)
-        
-        # Build validation prompt
-        validation_prompt = f"""
+
+    # The validation prompt is identical for every call except the query,
+    # response and document, so the fixed parts live here and the final
+    # prompt is assembled with one join instead of a fresh multi-KB f-string
+    _PROMPT_HEAD = """
         You are a fact-checking expert. Your job is simple:
-        
-        USER QUERY: {query}
-        
-        RESPONSE PROVIDED: {response}
-        
-        {f"FULL DOCUMENT FOR VERIFICATION:\n{full_document[:50000]}" if full_document else "FULL DOCUMENT NOT AVAILABLE"}
-        
+
+        USER QUERY: """
+
+    _PROMPT_RESPONSE = """
+
+        RESPONSE PROVIDED: """
+
+    _PROMPT_DOCUMENT = """
+
+        """
+
+    _PROMPT_TAIL = """
+
         Your tasks:
         1. Check if the query is answered: YES or NO
         2. Extract each factual claim from the response
         3. Verify each fact against the document: TRUE or FALSE
-        
+
         For example, if response says "AUM is $3.8bn in May 2021", that's one fact to check.
-        
+
         IMPORTANT FORMATTING RULES:
         - Never use asterisks or bold formatting (no ** or *)
         - Start each fact with a capital letter
         - Keep facts concise but complete
-        
+
         Example of correct formatting:
-        {{
+        {
             "facts_checked": [
-                {{
+                {
                     "fact": "The performance fee crystallizes over a rolling 3-year period",
                     "verified": true
-                }},
-                {{
+                },
+                {
                     "fact": "Management fee declines to 1% for investments exceeding $200mm",
                     "verified": false
-                }}
+                }
             ]
-        }}
-        
+        }
+
         Return JSON with this structure:
-        {{
+        {
             "query_answered": true/false,
             "facts_checked": [
-                {{
+                {
                     "fact": "The exact factual claim from the response (start with capital letter)",
                     "verified": true/false,
                     "page_found": "page number if found, or null"
-                }}
+                }
             ],
             "overall_accuracy": "percentage of facts that are true"
-        }}
-        
+        }
+
         Be generous - if a fact is essentially correct (e.g., $3.8bn vs $3,786mm), mark it TRUE.
         Focus on whether facts are correct, not on minor rounding or formatting differences.
         """
+
+    def _build_validation_prompt(self, query: str, response: str, full_document: Optional[str]) -> str:
+        """Assemble the validation prompt from the static template parts."""
+        if full_document:
+            # Already truncated to 50k chars by _read_document_cached
+            document_part = "FULL DOCUMENT FOR VERIFICATION:\n" + full_document
+        else:
+            document_part = "FULL DOCUMENT NOT AVAILABLE"
+        return "".join((
+            self._PROMPT_HEAD, query,
+            self._PROMPT_RESPONSE, response,
+            self._PROMPT_DOCUMENT, document_part,
+            self._PROMPT_TAIL
+        ))
+
+    def __init__(self):
+        """Initialize Gemini client."""
+        os.environ['GEMINI_API_KEY'] = settings.GEMINI_API_KEY
+        self.client = genai.Client()
+        self.model = settings.GEMINI_MODEL
+        self.extracted_texts_dir = Path("extracted_texts")
+        # Scan the directory up front: lookups become a dict get instead of
+        # a handful of stat calls plus a re-glob per validation. Misses
+        # trigger a rescan (see _load_extracted_document), so extractions
+        # written after construction are still found
+        self._refresh_xml_index()
+        # Recent validation results keyed by (query, response, document)
+        # digests; re-asking the same question becomes a dict lookup instead
+        # of a multi-second Gemini call
+        self._val_cache = collections.OrderedDict()
+
+    def _refresh_xml_index(self) -> None:
+        """(Re)scan extracted_texts into the stem-keyed lookup index."""
+        self._xml_index = {
+            p.stem.lower(): p
+            for p in self.extracted_texts_dir.glob("*.xml") if p.is_file()
+        }
+        self._xml_latest = max(
+            self._xml_index.values(),
+            key=lambda p: p.stat().st_mtime,
+            default=None
+        )
+
+    def validate_response_stream(
+        self, 
+        query: str, 
+        response: str, 
+        sources: Optional[List[Dict[str, Any]]] = None,
+        use_full_document: bool = True
+    ):
+        """
+        Stream validation with thinking process visible.
+        Yields tuples of (type, content) where type is 'thought' or 'result'.
+        """
         
+        # Try to load the full extracted document if available
+        full_document = None
+        if use_full_document:
+            full_document = self._load_extracted_document(sources)
+
+        # Without a document there is nothing to verify facts against, so
+        # don't spend a Gemini round-trip to find that out
+        if not full_document:
+            yield ("result", {
+                "query_answered": False,
+                "facts_checked": [],
+                "accuracy_score": 0,
+                "verified_facts": 0,
+                "total_facts": 0,
+                "overall_accuracy": "0%",
+                "note": "No extracted document available for verification"
+            })
+            return
+
+        cache_key = (
+            hashlib.blake2b(query.encode(), digest_size=16).digest(),
+            hashlib.blake2b(response.encode(), digest_size=16).digest(),
+            hashlib.blake2b(full_document.encode(), digest_size=16).digest()
+        )
+        cached = self._val_cache.get(cache_key)
+        if cached is not None:
+            self._val_cache.move_to_end(cache_key)
+            yield ("result", cached)
+            return
+
+        # Build validation prompt
+        validation_prompt = self._build_validation_prompt(query, response, full_document)
+
         thoughts = ""
         answer = ""
-        
+
+        # Short factual answers don't need a long thinking trace; a smaller
+        # budget cuts time-to-first-token substantially
+        thinking_budget = 256 if len(response) < 500 else 2048
+
         # Stream Gemini's validation with thinking visible
         for chunk in self.client.models.generate_content_stream(
             model=self.model,
             contents=validation_prompt,
             config=types.GenerateContentConfig(
                 thinking_config=types.ThinkingConfig(
-                    thinking_budget=2048,  # Increased for better analysis
+                    thinking_budget=thinking_budget,
                     include_thoughts=True  # Include thought summaries
                 ),
                 response_mime_type="application/json"
@@ -121,7 +221,7 @@ class GeminiValidator:
         
         # Parse the final JSON result
         try:
-            result = json.loads(answer)
+            result = _json_loads(answer)
             facts = result.get("facts_checked", [])
             verified_count = sum(1 for f in facts if f.get("verified", False))
             total_facts = len(facts)
@@ -139,6 +239,10 @@ class GeminiValidator:
                 "overall_accuracy": result.get("overall_accuracy", f"{accuracy}%")
             }
             
+            self._val_cache[cache_key] = final_result
+            if len(self._val_cache) > 64:
+                self._val_cache.popitem(last=False)
+
             yield ("result", final_result)
         except Exception as e:
             yield ("error", str(e))
@@ -169,57 +273,7 @@ class GeminiValidator:
             full_document = self._load_extracted_document(sources)
         
         # Build validation prompt
-        validation_prompt = f"""
-        You are a fact-checking expert. Your job is simple:
-        
-        USER QUERY: {query}
-        
-        RESPONSE PROVIDED: {response}
-        
-        {f"FULL DOCUMENT FOR VERIFICATION:\n{full_document[:50000]}" if full_document else "FULL DOCUMENT NOT AVAILABLE"}
-        
-        Your tasks:
-        1. Check if the query is answered: YES or NO
-        2. Extract each factual claim from the response
-        3. Verify each fact against the document: TRUE or FALSE
-        
-        For example, if response says "AUM is $3.8bn in May 2021", that's one fact to check.
-        
-        IMPORTANT FORMATTING RULES:
-        - Never use asterisks or bold formatting (no ** or *)
-        - Start each fact with a capital letter
-        - Keep facts concise but complete
-        
-        Example of correct formatting:
-        {{
-            "facts_checked": [
-                {{
-                    "fact": "The performance fee crystallizes over a rolling 3-year period",
-                    "verified": true
-                }},
-                {{
-                    "fact": "Management fee declines to 1% for investments exceeding $200mm",
-                    "verified": false
-                }}
-            ]
-        }}
-        
-        Return JSON with this structure:
-        {{
-            "query_answered": true/false,
-            "facts_checked": [
-                {{
-                    "fact": "The exact factual claim from the response (start with capital letter)",
-                    "verified": true/false,
-                    "page_found": "page number if found, or null"
-                }}
-            ],
-            "overall_accuracy": "percentage of facts that are true"
-        }}
-        
-        Be generous - if a fact is essentially correct (e.g., $3.8bn vs $3,786mm), mark it TRUE.
-        Focus on whether facts are correct, not on minor rounding or formatting differences.
-        """
+        validation_prompt = self._build_validation_prompt(query, response, full_document)
         
         # Get Gemini's validation
         response = self.client.models.generate_content(
@@ -234,7 +288,7 @@ class GeminiValidator:
         )
         
         try:
-            result = json.loads(response.text)
+            result = _json_loads(response.text)
             # Convert to old format for compatibility
             facts = result.get("facts_checked", [])
             verified_count = sum(1 for f in facts if f.get("verified", False))
@@ -278,46 +332,41 @@ class GeminiValidator:
             # Get document name from first source
             first_source = sources[0]
             doc_name = first_source.get('doc_name', '')
-            
+
             # Clean up the document name to match extracted file
             if doc_name:
                 # Remove extension and clean up
                 doc_name = doc_name.replace('.pdf', '').replace('.PDF', '')
-        
-        # If no document name from sources, try to find the most recent XML file
-        if not doc_name:
-            xml_files = list(self.extracted_texts_dir.glob("*.xml"))
-            if xml_files:
-                # Get the most recently modified XML file
-                latest_file = max(xml_files, key=lambda p: p.stat().st_mtime)
-                try:
-                    with open(latest_file, 'r', encoding='utf-8') as f:
-                        return f.read()
-                except Exception as e:
-                    print(f"Error loading {latest_file}: {e}")
-                    return None
-        
-        # Try to find the extracted XML file
-        possible_files = [
-            self.extracted_texts_dir / f"{doc_name}_extracted.xml",
-            self.extracted_texts_dir / f"{doc_name}.xml",
-            # Try Steadview file specifically (since it's our main test doc)
-            self.extracted_texts_dir / "Steadview Capital Partners LP_Investment Due Diligence_Jul-2021_Aksia (1)_extracted.xml"
-        ]
-        
-        for file_path in possible_files:
-            if file_path.exists():
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        print(f"Loaded full document from: {file_path.name}")
-                        return content
-                except Exception as e:
-                    print(f"Error loading {file_path}: {e}")
-        
-        print(f"Could not find extracted document for: {doc_name}")
-        return None
-    
+
+        # Look the document up in the index; fall back to the most recently
+        # modified extraction when sources don't name one
+        file_path = None
+        if doc_name:
+            key = doc_name.lower()
+            file_path = self._xml_index.get(f"{key}_extracted") or self._xml_index.get(key)
+        if file_path is None:
+            # The validator can outlive new extractions (the API server
+            # keeps one for the whole process), so a miss gets one cheap
+            # rescan before falling back to "latest" — otherwise a stale
+            # index could fact-check against the wrong document
+            self._refresh_xml_index()
+            if doc_name:
+                file_path = self._xml_index.get(f"{key}_extracted") or self._xml_index.get(key)
+            if file_path is None:
+                file_path = self._xml_latest
+
+        if file_path is None:
+            print(f"Could not find extracted document for: {doc_name}")
+            return None
+
+        try:
+            content = _read_document_cached(str(file_path), file_path.stat().st_mtime_ns)
+            print(f"Loaded full document from: {file_path.name}")
+            return content
+        except Exception as e:
+            print(f"Error loading {file_path}: {e}")
+            return None
+
     def check_factual_accuracy(self, statement: str, context: str) -> Dict[str, Any]:
         """
         Check if a specific statement is factually accurate given context.
@@ -356,7 +405,7 @@ class GeminiValidator:
         )
         
         try:
-            return json.loads(response.text)
+            return _json_loads(response.text)
         except:
             return {
                 "is_accurate": False,